@@ -1,3 +1,4 @@
+from typing import IO
 import zlib 
 
 
@@ -9,22 +10,46 @@ def inflate(data : bytes) -> bytes:
     @param data: the data to be decompressed
     @returns: the decompressed data
         """
-    decompress = zlib.decompressobj()
-    inflated = decompress.decompress(data)
+    # the whole stream is already in memory so use the one-shot API
+    return zlib.decompress(data)
+
+def inflater():
+    """
+    Create a decompressor that can be fed a DEFLATE stream a piece at a time,
+    call decompress on each piece and flush once the stream is complete.
+
+    @returns: a zlib decompression object
+        """
+    return zlib.decompressobj()
+
+def inflate_stream(f: IO[bytes], chunk_size: int = 65536) -> bytes:
+    """
+    Decompress DEFLATE data read from a file-like object a chunk at a time,
+    so decompression can start before the whole stream has been read.
+
+    @param f: the file-like object to read compressed data from
+    @param chunk_size: the number of bytes to read at a time
+    @returns: the decompressed data
+        """
+    decompress = inflater()
+    inflated = bytearray()
+    while chunk := f.read(chunk_size):
+        inflated += decompress.decompress(chunk)
     inflated += decompress.flush()
-    return inflated
+    return bytes(inflated)
 
-def deflate(data: bytes) -> bytes:
+def deflate(data: bytes, level: int = 6,
+            strategy: int = zlib.Z_FILTERED) -> bytes:
     """
     Compress the data using DEFLATE as specified in the PNG specification.
     Aspirationally would like to write my own version of this.
     
     @param data: the data to be decompressed
+    @param level: the zlib compression level, 1 is fastest and 9 is smallest
+    @param strategy: the zlib strategy, Z_FILTERED suits filtered image rows
+                     which are mostly small values
     @returns: the compressed data
         """
-    compress = zlib.compressobj()
-    deflated = compress.compress(data)
-    deflated += compress.flush()
-    return deflated
-
-
+    compress = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, 8,
+                                strategy)
+    return compress.compress(data) + compress.flush()
@@ -11,15 +11,23 @@ a x
 
 """
 
+from functools import lru_cache
+from itertools import groupby
 from sys import maxsize
 from typing import Dict, Callable, List, Tuple
-import random
+
+# maps a byte to its absolute value when read as a signed byte
+_ABSOLUTE_SIGNED_VALUE = bytes(min(b, 256 - b) for b in range(256))
 
 
 def filter(rows: List[bytes], img) -> List[Tuple[int, bytes]]:
     """
     Filter a series of rows return a list of tuples with 
 
+    Each row uses whichever filter gives the smallest sum of absolute
+    differences (treating the filtered bytes as signed), the heuristic
+    recommended by the spec and used by libpng.
+
     @param rows: 
     @param pixel_size: the number of bytes in each pixel
     @returns: list of tuples in the form (filter_type,filtered_row)
@@ -30,9 +38,11 @@ def filter(rows: List[bytes], img) -> List[Tuple[int, bytes]]:
              3: apply_filter_3,
              4: apply_filter_4}
     return_rows: List[Tuple[int, bytes]] = []
+    pixel_size = img.pixel_size
+    bit_depth = img.bit_depth
 
     for i in range(len(rows)):
-        if img.bit_depth < 8:
+        if bit_depth < 8:
             return_rows.append((0, rows[i]))
         else:
             best_method: int  = -1
@@ -40,11 +50,12 @@ def filter(rows: List[bytes], img) -> List[Tuple[int, bytes]]:
             best_row: bytes = b""
 
             for method in [0, 1, 2, 3, 4]:
-                found_row = funcs[method](rows, i, img.pixel_size)
+                found_row = funcs[method](rows, i, pixel_size)
+                found_sum = sum(found_row.translate(_ABSOLUTE_SIGNED_VALUE))
 
-                if sum(list(found_row)) < lowest_sum:
+                if found_sum < lowest_sum:
                     best_method = method
-                    lowest_sum = sum(list(found_row))
+                    lowest_sum = found_sum
                     best_row = found_row
 
             if best_method == -1:
@@ -63,22 +74,26 @@ def unfilter(rows: List[bytes], filter_types: List[int], pixel_size: int):
     @param pixel_size: the number of bytes in each pixel
     @param filter_types: the filter type of each row, must be of the same length as rows
     """
-    filter_functions: Dict[int, Callable] = {0: lambda *_: None,
-                                             1: reverse_filter_1,
-                                             2: reverse_filter_2,
+    filter_functions: Dict[int, Callable] = {1: reverse_filter_1,
                                              3: reverse_filter_3,
                                              4: reverse_filter_4}
     if len(rows) != len(filter_types):
         raise ValueError("Incorrect number of filter types supplied.")
 
-    for i, ft in enumerate(filter_types):
+    start = 0
+    for ft, run in groupby(filter_types):
+        stop = start + sum(1 for _ in run)
+
         if ft not in [0, 1, 2, 3, 4]:
             raise ValueError(f"Invalid filter type {ft} specified.")
-        defiltering_fn = filter_functions.get(ft)
-        if defiltering_fn:
-            defiltering_fn(rows, i, pixel_size)
-        else:
-            raise NotImplementedError(f"Filter type {ft} not implemented.")
+        if ft == 2:
+            _reverse_filter_2_run(rows, start, stop)
+        elif ft != 0:
+            defiltering_fn = filter_functions[ft]
+            for i in range(start, stop):
+                defiltering_fn(rows, i, pixel_size)
+
+        start = stop
 
 
 def reverse_filter_1(rows: List[bytes], index: int, px_size: int) -> None:
@@ -90,17 +105,17 @@ def reverse_filter_1(rows: List[bytes], index: int, px_size: int) -> None:
     @param rows: The rows as a list of bytes or length image height
     @param index: The row to operate on
     """
-    row = list(rows[index])
+    length = len(rows[index])
+    low, high = _lane_masks(length)
+    row = int.from_bytes(rows[index], "little")
 
-    for i in range(0, len(row), px_size):
-        x_val = row[i:i+px_size]
-        a_val = row[i-px_size:i] if i - \
-            px_size >= 0 else [0 for _ in range(px_size)]
+    # x += a is a prefix sum along each px_size strided lane
+    shift = px_size
+    while shift < length:
+        row = _swar_add(row, (row << (8*shift)) & (low | high), low, high)
+        shift *= 2
 
-        for j in range(px_size):
-            row[i+j] = (x_val[j] + a_val[j]) % 256
-
-    rows[index] = bytes(row)
+    rows[index] = row.to_bytes(length, "little")
 
 
 def apply_filter_1(rows: List[bytes], index: int, px_size: int) -> bytes:
@@ -112,18 +127,12 @@ def apply_filter_1(rows: List[bytes], index: int, px_size: int) -> bytes:
     @param row_in_byts: the row to filter
     @returns: the filtered row
     """
-    row = list(rows[index])
-    unfiltered_row = list(rows[index])
-
-    for i in range(0, len(row), px_size):
-        x_val = row[i:i+px_size]
-        a_val = unfiltered_row[i-px_size:i] if i - \
-            px_size >= 0 else [0 for _ in range(px_size)]
-
-        for j in range(px_size):
-            row[i+j] = (x_val[j] - a_val[j]) % 256
+    length = len(rows[index])
+    low, high = _lane_masks(length)
+    row = int.from_bytes(rows[index], "little")
+    left = (row << (8*px_size)) & (low | high)
 
-    return bytes(row)
+    return _swar_sub(row, left, low, high).to_bytes(length, "little")
 
 
 def reverse_filter_2(rows: List[bytes], index: int, px_size: int) -> None:
@@ -136,18 +145,42 @@ def reverse_filter_2(rows: List[bytes], index: int, px_size: int) -> None:
     @param rows: The rows as a list of bytes or length image height
     @param index: The row to operate on
     """
-    row = list(rows[index])
-    above_row = list(
-        rows[index-1]) if index > 0 else [0 for _ in range(len(row))]
+    # the row above the first row is all 0s so the first row is unchanged
+    if index == 0:
+        return
 
-    for i in range(0, len(row), px_size):
-        x_val = row[i:i+px_size]
-        b_val = above_row[i:i+px_size]
+    length = len(rows[index])
+    low, high = _lane_masks(length)
+    row = int.from_bytes(rows[index], "little")
+    above_row = int.from_bytes(rows[index-1], "little")
 
-        for j in range(px_size):
-            row[i+j] = (x_val[j] + b_val[j]) % 256
+    rows[index] = _swar_add(row, above_row, low, high).to_bytes(length,
+                                                                "little")
 
-    rows[index] = bytes(row)
+
+def _reverse_filter_2_run(rows: List[bytes], start: int, stop: int) -> None:
+    """
+    Unfilter the rows rows[start:stop] which all use filter type 2, in place.
+    Each reconstructed row is kept as an int to be added to the next one.
+
+    @param rows: The rows as a list of bytes or length image height
+    @param start: The first row to operate on
+    @param stop: The row after the last row to operate on
+    """
+    # the row above the first row is all 0s so the first row is unchanged
+    if start == 0:
+        start = 1
+    if start >= stop:
+        return
+
+    length = len(rows[start])
+    low, high = _lane_masks(length)
+    above_row = int.from_bytes(rows[start-1], "little")
+
+    for i in range(start, stop):
+        above_row = _swar_add(int.from_bytes(rows[i], "little"), above_row,
+                              low, high)
+        rows[i] = above_row.to_bytes(length, "little")
 
 
 def apply_filter_2(rows: List[bytes], index: int, px_size: int) -> bytes:
@@ -159,18 +192,15 @@ def apply_filter_2(rows: List[bytes], index: int, px_size: int) -> bytes:
     @param rows: the rows in the image
     @returns: the filtered row
     """
-    row = list(rows[index])
-    above_row = list(
-        rows[index-1]) if index > 0 else [0 for _ in range(len(row))]
-
-    for i in range(0, len(row), px_size):
-        x_val = row[i:i+px_size]
-        b_val = above_row[i:i+px_size]
+    if index == 0:
+        return bytes(rows[index])
 
-        for j in range(px_size):
-            row[i+j] = (x_val[j] - b_val[j]) % 256
+    length = len(rows[index])
+    low, high = _lane_masks(length)
+    row = int.from_bytes(rows[index], "little")
+    above_row = int.from_bytes(rows[index-1], "little")
 
-    return bytes(row)
+    return _swar_sub(row, above_row, low, high).to_bytes(length, "little")
 
 
 def reverse_filter_3(rows: List[bytes], index: int, px_size: int) -> None:
@@ -182,18 +212,17 @@ def reverse_filter_3(rows: List[bytes], index: int, px_size: int) -> None:
     @param rows: The rows as a list of bytes or length image height
     @param index: The row to operate on
     """
-    row = list(rows[index])
-    above_row = list(
-        rows[index-1]) if index > 0 else [0 for _ in range(len(row))]
+    row = bytearray(rows[index])
+    above_row = rows[index-1] if index > 0 else bytes(len(row))
+
+    for i in range(min(px_size, len(row))):
+        row[i] = (row[i] + (above_row[i] >> 1)) & 0xFF
 
-    for i in range(0, len(row), px_size):
-        x_val = row[i:i+px_size]
-        b_val = above_row[i:i+px_size]
-        a_val = row[i-px_size:i] if i - \
-            px_size >= 0 else [0 for _ in range(px_size)]
+    # zipping row itself means a is read after it has been unfiltered
+    for i, a_val, b_val in zip(range(px_size, len(row)), row,
+                               above_row[px_size:]):
+        row[i] = (row[i] + ((a_val + b_val) >> 1)) & 0xFF
 
-        for j in range(px_size):
-            row[i+j] = (x_val[j] + ((a_val[j] + b_val[j])//2)) % 256
     rows[index] = bytes(row)
 
 
@@ -206,21 +235,14 @@ def apply_filter_3(rows: List[bytes], index: int, px_size: int) -> bytes:
     @param rows: the rows in the image
     @returns: the filtered row
     """
-    row = list(rows[index])
-    unfiltered_row = list(rows[index])
-    above_row = list(
-        rows[index-1]) if index > 0 else [0 for _ in range(len(row))]
-
-    for i in range(0, len(row), px_size):
-        x_val = row[i:i+px_size]
-        b_val = above_row[i:i+px_size]
-        a_val = unfiltered_row[i-px_size:i] if i - \
-            px_size >= 0 else [0 for _ in range(px_size)]
-
-        for j in range(px_size):
-            row[i+j] = (x_val[j] - ((a_val[j] + b_val[j])//2)) % 256
+    length = len(rows[index])
+    low, high = _lane_masks(length)
+    row = int.from_bytes(rows[index], "little")
+    left = (row << (8*px_size)) & (low | high)
+    above_row = int.from_bytes(rows[index-1], "little") if index > 0 else 0
 
-    return bytes(row)
+    average = _swar_avg(left, above_row, low)
+    return _swar_sub(row, average, low, high).to_bytes(length, "little")
 
 
 def reverse_filter_4(rows: List[bytes], index: int, px_size: int) -> None:
@@ -232,21 +254,38 @@ def reverse_filter_4(rows: List[bytes], index: int, px_size: int) -> None:
     @param rows: The rows as a list of bytes or length image height
     @param index: The row to operate on
     """
-    row = list(rows[index])
-    above_row = list(
-        rows[index-1]) if index > 0 else [0 for _ in range(len(row))]
-
-    for i in range(0, len(row), px_size):
-        x_val = row[i:i+px_size]
-        b_val = above_row[i:i+px_size]
-        a_val = row[i-px_size:i] if i - \
-            px_size >= 0 else [0 for _ in range(px_size)]
-        c_val = above_row[i-px_size:i] if i - \
-            px_size >= 0 else [0 for _ in range(px_size)]
-
-        for j in range(px_size):
-            row[i+j] = (x_val[j] + paeth_predictor(a_val[j],
-                        b_val[j], c_val[j])) % 256
+    # with b = c = 0 the predictor always picks a, which is the Sub filter
+    if index == 0:
+        reverse_filter_1(rows, index, px_size)
+        return
+
+    row = bytearray(rows[index])
+    above_row = rows[index-1]
+
+    # with a = c = 0 the predictor always picks b
+    for i in range(min(px_size, len(row))):
+        row[i] = (row[i] + above_row[i]) & 0xFF
+
+    # paeth_predictor inlined, zipping row itself means a is already unfiltered
+    for i, a_val, b_val, c_val in zip(range(px_size, len(row)), row,
+                                      above_row[px_size:], above_row):
+        pa = b_val - c_val
+        pb = a_val - c_val
+        pc = pa + pb
+        if pa < 0:
+            pa = -pa
+        if pb < 0:
+            pb = -pb
+        if pc < 0:
+            pc = -pc
+
+        if pa <= pb and pa <= pc:
+            row[i] = (row[i] + a_val) & 0xFF
+        elif pb <= pc:
+            row[i] = (row[i] + b_val) & 0xFF
+        else:
+            row[i] = (row[i] + c_val) & 0xFF
+
     rows[index] = bytes(row)
 
 
@@ -259,23 +298,39 @@ def apply_filter_4(rows: List[bytes], index: int, px_size: int) -> bytes:
     @param rows: the rows in the image
     @returns: the filtered row
     """
-    row = list(rows[index])
-    unfiltered_row = list(rows[index])
-    above_row = list(
-        rows[index-1]) if index > 0 else [0 for _ in range(len(row))]
-
-    for i in range(0, len(row), px_size):
-        x_val = row[i:i+px_size]
-        b_val = above_row[i:i+px_size]
-        a_val = unfiltered_row[i-px_size:i] if i - \
-            px_size >= 0 else [0 for _ in range(px_size)]
-        c_val = above_row[i-px_size:i] if i - \
-            px_size >= 0 else [0 for _ in range(px_size)]
+    # with b = c = 0 the predictor always picks a, which is the Sub filter
+    if index == 0:
+        return apply_filter_1(rows, index, px_size)
+
+    row = rows[index]
+    above_row = rows[index-1]
+    filtered_row = bytearray(len(row))
+
+    # with a = c = 0 the predictor always picks b
+    for i in range(min(px_size, len(row))):
+        filtered_row[i] = (row[i] - above_row[i]) & 0xFF
+
+    # paeth_predictor inlined as in reverse_filter_4
+    for i, a_val, b_val, c_val in zip(range(px_size, len(row)), row,
+                                      above_row[px_size:], above_row):
+        pa = b_val - c_val
+        pb = a_val - c_val
+        pc = pa + pb
+        if pa < 0:
+            pa = -pa
+        if pb < 0:
+            pb = -pb
+        if pc < 0:
+            pc = -pc
+
+        if pa <= pb and pa <= pc:
+            filtered_row[i] = (row[i] - a_val) & 0xFF
+        elif pb <= pc:
+            filtered_row[i] = (row[i] - b_val) & 0xFF
+        else:
+            filtered_row[i] = (row[i] - c_val) & 0xFF
 
-        for j in range(px_size):
-            row[i+j] = (x_val[j] - paeth_predictor(a_val[j],
-                        b_val[j], c_val[j])) % 256
-    return bytes(row)
+    return bytes(filtered_row)
 
 
 def paeth_predictor(a_val, b_val, c_val):
@@ -295,3 +350,38 @@ def paeth_predictor(a_val, b_val, c_val):
         return b_val
     else:
         return c_val
+
+
+@lru_cache(maxsize=8)
+def _lane_masks(length: int) -> Tuple[int, int]:
+    """
+    Get the masks for the low 7 bits and the high bit of every byte of a
+    row of length bytes packed into an int.
+
+    The _swar_* helpers work on a whole row packed into an int with
+    int.from_bytes(row, "little"), treating each byte as its own lane.
+    Every row of an image is the same length so the masks are cached.
+    """
+    return (int.from_bytes(b"\x7f" * length, "little"),
+            int.from_bytes(b"\x80" * length, "little"))
+
+
+def _swar_add(x: int, y: int, low: int, high: int) -> int:
+    """
+    Add each byte of x to the corresponding byte of y modulo 256.
+    """
+    return ((x & low) + (y & low)) ^ ((x ^ y) & high)
+
+
+def _swar_sub(x: int, y: int, low: int, high: int) -> int:
+    """
+    Subtract each byte of y from the corresponding byte of x modulo 256.
+    """
+    return ((x | high) - (y & low)) ^ ((x ^ ~y) & high)
+
+
+def _swar_avg(x: int, y: int, low: int) -> int:
+    """
+    Get floor((x+y)/2) of each byte of x and the corresponding byte of y.
+    """
+    return (x & y) + (((x ^ y) >> 1) & low)
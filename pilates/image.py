@@ -1,15 +1,13 @@
 from collections.abc import Iterable
-from copy import deepcopy
-from typing import IO, Dict, Callable, List, Literal
-from io import BytesIO
+from itertools import chain
+from typing import IO, Dict, List, Literal, Sequence
 import logging
+import struct
 from sys import maxsize
 
-from .compression import deflate, inflate
+from .compression import deflate, inflater
 from .filtering import unfilter, filter
-from .utils import check_crc, get_crc, get_x_bits
-
-logging.basicConfig(level=logging.INFO)
+from .utils import check_crc, get_crc
 
 
 class Image:
@@ -21,9 +19,15 @@ class Image:
                                         3: [1, 2, 4, 8],
                                         4: [8, 16],
                                         6: [8, 16]}
+    # the names of the methods used to parse each supported chunk type
+    _chunk_parsers_by_type = {b"IHDR": "_parse_IHDR_chunk",
+                              b"IEND": "_parse_IEND_chunk",
+                              b"IDAT": "_parse_IDAT_chunk",
+                              b"tEXt": "_parse_tEXt_chunk",
+                              b"PLTE": "_parse_PLTE_chunk"}
 
     def __init__(self) -> None:
-        print("New image")
+        logging.debug("New image")
 
         # set our defaults
         self._width: int = 0
@@ -40,20 +44,25 @@ class Image:
         # attributes used in parsing
         self._finished_parsing: bool = False
         self._parsed_chunks: List[bytes] = []
-        self._IDAT_stream: bytes = b""
+        self._IDAT_buf: bytearray = bytearray()
+        self._inflater = None
+        self._validate_crc: bool = True
         self._pixels_loaded: bool = False
 
     @classmethod
-    def from_file(cls, file_path: str):
+    def from_file(cls, file_path: str, *, validate_crc: bool = True):
         """
         Create an image from a png file.
 
         @param file_path: the path of the png file to be opened
+        @param validate_crc: whether to check the crc of each chunk, skipping
+                             the check is only safe for trusted files
         @return: created Image object
         @raises: ValueError if PNG is not a valid format
         @raises: FileNotFoundError if PNG is not found
             """
         image = cls()
+        image._validate_crc = validate_crc
         with open(file_path, "rb") as f:
             found_header = f.read(8)
             # All PNG files have the same header so if this file
@@ -100,50 +109,52 @@ class Image:
         else:
             image._test_pixel(background_colour)
 
-        image._pixels = [
-            [background_colour for _ in range(width)]for _ in range(height)]
+        # pixels are only ever replaced, never edited in place, so they can
+        # share one copy of the background colour
+        background_colour = list(background_colour)
+        image._pixels = [[background_colour] * width for _ in range(height)]
         image._finished_parsing = True
         return image
 
-    def to_bytes(self) -> bytes:
+    def to_bytes(self, compression_level: int = 6) -> bytes:
         """
         Convert the image to a bytes object that can be saved as a png
+
+        @param compression_level: the zlib level used for the image data,
+                                  lower is faster to write but larger
         """
-        def add_chunk_length_bytes(byts: bytes):
+        def build_chunk(chunk_type: bytes, body: bytes) -> List[bytes]:
             """
-            Add the length byte to a chunk
+            Get the length, type, body and crc of a chunk as the pieces to be
+            joined, keeping the body separate so it is only copied once
             """
-            length = len(byts) - 8  # the chunk-type field is 4 bytes
-            if length < 0:
+            # the PNG spec caps chunk lengths at 2**31 - 1
+            if len(body) >= 1 << 31:
                 raise ValueError("Invalid chunk generated.")
-            byts = length.to_bytes(4) + byts
-            return byts
-
-        def add_crc(byts: bytes):
-            return byts + get_crc(byts)
+            return [len(body).to_bytes(4), chunk_type, body,
+                    get_crc(chunk_type, body)]
 
         if not self._pixels:
             raise ValueError("Cannot conver to bytes as IDAT data not parsed.")
 
-        img_as_bytes = self._header
-        img_as_bytes += add_chunk_length_bytes(
-            add_crc(self._generate_IHDR_chunk()))
-        img_as_bytes += add_chunk_length_bytes(
-            add_crc(self._generate_IDAT_chunk()))
-        img_as_bytes += add_chunk_length_bytes(
-            add_crc(self._generate_IEND_chunk()))
+        pieces = [self._header]
+        pieces += build_chunk(b"IHDR", self._generate_IHDR_chunk())
+        pieces += build_chunk(b"IDAT",
+                              self._generate_IDAT_chunk(compression_level))
+        pieces += build_chunk(b"IEND", self._generate_IEND_chunk())
 
-        return img_as_bytes
+        return b"".join(pieces)
 
-    def to_file(self, filename: str) -> None:
+    def to_file(self, filename: str, compression_level: int = 6) -> None:
         """
         Save the image as a png at filename
 
         @param filename: the filename to save to
+        @param compression_level: the zlib level used for the image data
         @raises FileNotFoundError: if filename isn't valid
         """
         with open(filename, "wb") as f:
-            f.write(self.to_bytes())
+            f.write(self.to_bytes(compression_level))
 
     def _parse_chunk(self, f: IO[bytes], length: int) -> None:
         """
@@ -151,23 +162,18 @@ class Image:
         @param f: file pointer to the PNG file as a bytes object
         @param length: the length of the chunk
         """
-        chunk_types: Dict[bytes, Callable] = {b"IHDR": self._parse_IHDR_chunk,
-                                              b"IEND": self._parse_IEND_chunk,
-                                              b"IDAT": self._parse_IDAT_chunk,
-                                              b"tEXt": self._parse_tEXt_chunk,
-                                              b"PLTE": self._parse_PLTE_chunk}
         chunk_type = f.read(4)
         if not chunk_type:
             raise ValueError("Not a valid chunk.")
 
-        chunk_parsing_fn = chunk_types.get(chunk_type)
-        if not chunk_parsing_fn:
-            logging.warning(f"Chunk ignored {chunk_type}")
+        chunk_parser = self._chunk_parsers_by_type.get(chunk_type)
+        if not chunk_parser:
+            logging.warning("Chunk ignored %s", chunk_type)
             # Data plus the CRC at the end
             f.read(length+4)
         else:
-            logging.info(f"Parsing {chunk_type}")
-            chunk_parsing_fn(f, length)
+            logging.info("Parsing %s", chunk_type)
+            getattr(self, chunk_parser)(f, length)
             self._parsed_chunks.append(chunk_type)
 
     def _parse_tEXt_chunk(self, f: IO[bytes], length: int) -> None:
@@ -177,61 +183,45 @@ class Image:
         @param f: file pointer to the PNG file as a bytes object
         @param length: the length of the chunk
         """
-        key = b""
-        value = b""
-
         data = f.read(length)
 
-        seen_null = False
-
-        for char in list(data):
-            if not seen_null and char:
-                key += (char.to_bytes(1))
-            elif not char:
-                seen_null = True
-            elif seen_null:
-                value += char.to_bytes(1)
+        key, _, value = data.partition(b"\x00")
 
-        self._text_attributes[key.decode("utf-8")] = value.decode("utf-8")
+        # tEXt is latin-1 according to the PNG specification
+        self._text_attributes[key.decode("latin-1")] = value.decode("latin-1")
         _ = f.read(4)
 
     def _log_state(self) -> None:
         """"
         log the state of the image to INFO 
         """
-        logging.info(f"Image shape ({self._width},{self._height})")
-        logging.info(f"Bit depth {self._bit_depth}")
-        logging.info(f"Colour type {self._colour_type}")
-        logging.info(f"Compression method {self._compression_method}")
-        logging.info(f"Filter method {self._filter_method}")
-        logging.info(f"Interlace method {self._interlace_method}")
+        logging.info("Image shape (%s,%s)", self._width, self._height)
+        logging.info("Bit depth %s", self._bit_depth)
+        logging.info("Colour type %s", self._colour_type)
+        logging.info("Compression method %s", self._compression_method)
+        logging.info("Filter method %s", self._filter_method)
+        logging.info("Interlace method %s", self._interlace_method)
 
-    def _parse_IHDR_chunk(self, f: IO[bytes], _: int) -> None:
+    def _parse_IHDR_chunk(self, f: IO[bytes], length: int) -> None:
         """
         Parse a single chunk of type IHDR and store the attributes.
 
         @param f: file pointer to the PNG file as a bytes object
         @param length: the length of the chunk
         """
-        width = f.read(4)
-        height = f.read(4)
-        bit_depth = f.read(1)
-        colour_type = f.read(1)
-        compression_method = f.read(1)
-        filter_method = f.read(1)
-        interlace_method = f.read(1)
-
+        if length != 13:
+            raise ValueError("Invalid IHDR length.")
+        data = f.read(13)
+        if len(data) != 13:
+            raise ValueError("IHDR chunk is truncated.")
         crc = f.read(4)
-        check_crc(b"IHDR"+width+height+bit_depth+colour_type +
-                  compression_method+filter_method+interlace_method, crc)
+        if self._validate_crc:
+            check_crc(b"IHDR", data, crc)
 
-        self._width = int.from_bytes(width)
-        self._height = int.from_bytes(height)
-        self._bit_depth = int.from_bytes(bit_depth)
-        self._colour_type = int.from_bytes(colour_type)
-        self._compression_method = int.from_bytes(compression_method)
-        self._filter_method = int.from_bytes(filter_method)
-        self._interlace_method = int.from_bytes(interlace_method)
+        # width and height are 4 byte ints, the other five fields a byte each
+        (self._width, self._height, self._bit_depth, self._colour_type,
+         self._compression_method, self._filter_method,
+         self._interlace_method) = struct.unpack(">IIBBBBB", data)
 
         self._log_state()
 
@@ -262,17 +252,17 @@ class Image:
         """
         palette: bytes = f.read(length)
         crc: bytes = f.read(4)
-        check_crc(b"PLTE"+palette, crc)
+        if self._validate_crc:
+            check_crc(b"PLTE", palette, crc)
 
         # We are only gonna use the PLTE if colour_type is 3
         if self._colour_type != 3:
             return
 
-        palette_as_list = list(palette)
-        for i in range(0, length, 3):
-            self._palette += [(palette_as_list[i],
-                               palette_as_list[i+1],
-                               palette_as_list[i+2])]
+        if length % 3:
+            raise ValueError("PLTE chunk length must be divisible by 3.")
+
+        self._palette += zip(palette[0::3], palette[1::3], palette[2::3])
 
     def _parse_IDAT_chunk(self, f: IO[bytes], length: int) -> None:
         """
@@ -291,9 +281,12 @@ class Image:
         compressed_data: bytes = (f.read(length))
         crc = f.read(4)
 
-        check_crc(b"IDAT" + compressed_data, crc)
+        if self._validate_crc:
+            check_crc(b"IDAT", compressed_data, crc)
 
-        self._IDAT_stream += compressed_data
+        if self._inflater is None:
+            self._inflater = inflater()
+        self._IDAT_buf += self._inflater.decompress(compressed_data)
 
     def _defilter(self, data: bytes) -> List[bytes]:
         """
@@ -304,27 +297,19 @@ class Image:
         """
 
         w, h = self.shape
-        decompressed_reader: IO[bytes] = BytesIO(data)
-
-        rows = []
-        filter_types = []
-
-        number_bytes_read = 0
-        for _ in range(h):
-            filtering_type = decompressed_reader.read(1)
-            number_bytes_read += 1
-            filter_types.append(int.from_bytes(filtering_type))
+        pixel_size_in_bits = self._pixel_size_in_bits
+        number_of_bytes_in_row: int = -(-(pixel_size_in_bits*w)//8)
+        # each row is preceded by a single byte giving its filter type
+        row_stride = number_of_bytes_in_row + 1
 
-            number_of_bytes_in_row: int = -(-(self._pixel_size_in_bits*w)//8)
+        if len(data) < row_stride*h:
+            raise ValueError("Not enough image data for the image shape.")
 
-            filtered_row: bytes = decompressed_reader.read(
-                number_of_bytes_in_row)
-            number_bytes_read += number_of_bytes_in_row
+        filter_types = [data[y*row_stride] for y in range(h)]
+        rows = [data[y*row_stride+1:(y+1)*row_stride] for y in range(h)]
 
-            rows.append(filtered_row)
-
-        unfilter(rows, filter_types, -(-self._pixel_size_in_bits//8))
-        logging.info(f"Filter types {filter_types}")
+        unfilter(rows, filter_types, -(-pixel_size_in_bits//8))
+        logging.debug("Filter types %s", filter_types)
         return rows
 
     def _parse_raw_image_data(self, rows: List[bytes]) -> None:
@@ -335,31 +320,40 @@ class Image:
         @param rows: the rows of the image as a list of bytes arrays
         """
         w, h = self.shape
-        print(w, h)
-
-        pixels: List[List[List[int]]] = []
-        bits_read = 0
-
-        for row in rows:
-            row_pixels: List[List] = []
-            for _ in range(w):
-                pixel: List[int] = []
-                if self._colour_type == 3:
-                    val, row = get_x_bits(self.bit_depth, row)
-                    bits_read += self.bit_depth
-                    val = int.from_bytes(val)
-                    try:
-                        pixel = list(self._palette[val])
-                    except IndexError:
-                        raise ValueError("Invalid palette index.")
-                else:
-                    for _ in range(self.numb_samples_per_pixel):
-                        bits_read += self._bit_depth
-                        val, row = get_x_bits(self._bit_depth, row)
-                        val = int.from_bytes(val)
-                        pixel.append(val)
-                row_pixels.append(pixel)
-            pixels.append(row_pixels)
+        logging.debug("Parsing image data of shape (%s,%s)", w, h)
+
+        bit_depth = self._bit_depth
+        samples_per_pixel = self.numb_samples_per_pixel
+        samples_per_row = w * samples_per_pixel
+        palette = self._palette if self._colour_type == 3 else None
+
+        row_samples: Iterable[Sequence[int]]
+        if bit_depth == 8:
+            row_samples = rows
+        elif bit_depth == 16:
+            row_samples = map(struct.Struct(f">{samples_per_row}H").unpack,
+                              rows)
+        else:
+            # unpack every possible byte into its samples up front
+            mask = (1 << bit_depth) - 1
+            samples_by_byte = [tuple((byte >> shift) & mask
+                                     for shift in range(8-bit_depth, -1, -bit_depth))
+                               for byte in range(256)]
+            # the last byte can be padded so drop any extra samples
+            row_samples = (list(chain.from_iterable(
+                               map(samples_by_byte.__getitem__, row)))[:samples_per_row]
+                           for row in rows)
+
+        pixels: List[List[List[int]]]
+        if palette is not None:
+            try:
+                pixels = [[list(palette[val]) for val in samples]
+                          for samples in row_samples]
+            except IndexError:
+                raise ValueError("Invalid palette index.")
+        else:
+            pixels = [list(map(list, zip(*[iter(samples)]*samples_per_pixel)))
+                      for samples in row_samples]
 
         # if the image has index based colour we convert it to the equivilent
         # normal version
@@ -376,11 +370,13 @@ class Image:
         @param f: file pointer to the PNG file as a bytes object
         @param length: the length of the chunk
         """
-        print("Decompressed")
-        decompressed_data: bytes = inflate(self._IDAT_stream)
-        rows = self._defilter(decompressed_data)
+        if self._inflater is None:
+            raise ValueError("PNG must contain at least one IDAT chunk.")
+        self._IDAT_buf += self._inflater.flush()
+        rows = self._defilter(self._IDAT_buf)
+        self._IDAT_buf = bytearray()
         self._parse_raw_image_data(rows)
-        print("Parsed")
+        logging.debug("Parsed image data")
 
         # For the CRC doesn't strictly matter as we are going to stop parsing anyway
         _ = f.read(4)
@@ -388,57 +384,49 @@ class Image:
 
     def _generate_IHDR_chunk(self) -> bytes:
         """
-        Generate the IHDR chunk as a bytes, doesn't include the size.
+        Generate the body of the IHDR chunk, doesn't include the size or type.
         """
-        chunk: bytes = b"IHDR"
-
-        chunk += self._width.to_bytes(4)
-        chunk += self._height.to_bytes(4)
-
-        chunk += self._bit_depth.to_bytes(1)
-        chunk += self._colour_type.to_bytes(1)
+        # compression, filter and interlace methods are all 0
+        return struct.pack(">IIBBBBB", self._width, self._height,
+                           self._bit_depth, self._colour_type, 0, 0, 0)
 
-        chunk += int(0).to_bytes(1)  # Compression method (only 0 is supported)
-        chunk += int(0).to_bytes(1)  # Filter method (only 0 is supported)
-        # Interlace method (we won't apply any interlacing)
-        chunk += int(0).to_bytes(1)
-
-        return chunk
-
-    def _generate_IDAT_chunk(self) -> bytes:
+    def _generate_IDAT_chunk(self, compression_level: int = 6) -> bytes:
         """
-        Generate the IDAT chunk as a bytes, doesn't include the size.
-        """
-        logging.info(f"Found pixels in shape ({
-                     len(self._pixels[0])},{len(self._pixels)})")
-
-        rows: List[bytes] = []
-        for pix_row in self._pixels:
-            # TODO: Add support for other filtering methods we only apply no filter here
-            row: bytes = b""
-            samples = []
-            for pix in pix_row:
-                for sample in pix:
-                    samples.append(sample)
+        Generate the body of the IDAT chunk, doesn't include the size or type.
 
-            str_row = "".join(
-                [f"{s:0{self._bit_depth}b}" for s in samples])
-
-            # If len(str_row) is not devisible by 8 then pad with 0s
-            str_row += "0" * ((8 - (len(str_row) % 8)) % 8)
-
-            row += bytes([int(str_row[i:i+8], 2)
-                         for i in range(0, len(str_row), 8)])
+        @param compression_level: the zlib level used to compress the data
+        """
+        logging.info("Found pixels in shape (%s,%s)",
+                     len(self._pixels[0]), len(self._pixels))
 
-            rows.append(row)
+        bit_depth = self._bit_depth
+        samples_per_row = len(self._pixels[0]) * self.numb_samples_per_pixel
+        row_length = -(-samples_per_row*bit_depth//8)
+        # the bits needed to pad the last sample out to a whole byte
+        padding = row_length*8 - samples_per_row*bit_depth
 
-        chunk: bytes = b""
+        rows: List[bytes]
+        if bit_depth == 8:
+            rows = [bytes(chain.from_iterable(pix_row))
+                    for pix_row in self._pixels]
+        elif bit_depth == 16:
+            row_format = f">{samples_per_row}H"
+            rows = [struct.pack(row_format, *chain.from_iterable(pix_row))
+                    for pix_row in self._pixels]
+        else:
+            rows = []
+            for pix_row in self._pixels:
+                packed = 0
+                for sample in chain.from_iterable(pix_row):
+                    packed = (packed << bit_depth) | sample
+                rows.append((packed << padding).to_bytes(row_length, "big"))
 
-        for i, filtered_row in filter(rows,self):
-            chunk += int(i).to_bytes(1) + filtered_row
+        filtered_data = bytearray()
+        for filter_type, filtered_row in filter(rows, self):
+            filtered_data.append(filter_type)
+            filtered_data += filtered_row
 
-        chunk = b"IDAT" + deflate(chunk)
-        return chunk
+        return deflate(filtered_data, compression_level)
 
     @property 
     def numb_unique_colours(self):
@@ -451,9 +439,9 @@ class Image:
 
     def _generate_IEND_chunk(self) -> bytes:
         """
-        Generate the IEND chunk as a bytes, doesn't include the size.
+        Generate the body of the IEND chunk, which is empty.
         """
-        return b"IEND"
+        return b""
 
     def to_grayscale(self) -> None:
         """
@@ -465,21 +453,17 @@ class Image:
             raise ValueError(
                 "Can only convert truecolour images to grayscale.")
 
-        def int_average(lst: List[int]) -> int:
-            return round(sum(lst) / len(lst))
-
         # truecolour images must have bit_depth = 8 or 16 which
         # is also valid for grayscale so no need to change
-        w, h = self.shape
-        new_pixels = [[[] for _ in range(w)]for _ in range(h)]
         self._colour_type = 0 if self._colour_type == 2 else 4
-        for x in range(w):
-            for y in range(h):
-                px = self.get_pixel(x, y)
-                if self.colour_type == 0:
-                    new_pixels[y][x] = [int_average(px)]
-                if self.colour_type == 4:
-                    new_pixels[y][x] = [int_average(px[:3]), px[-1]]
+
+        # (r + g + b + 1) // 3 is round((r + g + b) / 3), which never ties
+        if self.colour_type == 0:
+            new_pixels = [[[(r + g + b + 1) // 3] for r, g, b in row]
+                          for row in self._pixels]
+        else:
+            new_pixels = [[[(r + g + b + 1) // 3, a] for r, g, b, a in row]
+                          for row in self._pixels]
 
         self.replace_pixels(new_pixels)
 
@@ -497,16 +481,12 @@ class Image:
 
         # truecolour images must have bit_depth = 8 or 16 which
         # is also valid for grayscale so no need to change
-        w, h = self.shape
-        new_pixels = [[[] for _ in range(w)]for _ in range(h)]
         self._colour_type = 2 if self._colour_type == 0 else 6
-        for x in range(w):
-            for y in range(h):
-                px = self.get_pixel(x, y)
-                if self.colour_type == 2:
-                    new_pixels[y][x] = [px[0], px[0], px[0]]
-                if self.colour_type == 6:
-                    new_pixels[y][x] = [px[0], px[0], px[0], px[1]]
+        if self.colour_type == 2:
+            new_pixels = [[[v, v, v] for v, in row] for row in self._pixels]
+        else:
+            new_pixels = [[[v, v, v, a] for v, a in row]
+                          for row in self._pixels]
 
         self.replace_pixels(new_pixels)
 
@@ -523,14 +503,10 @@ class Image:
                 "Can only add alpha to truecolour and greyscale images that don't \
                 have alpha samples.")
 
-        w, h = self.shape
-        new_pixels = [[[] for _ in range(w)]for _ in range(h)]
         self._colour_type = {0: 4, 2: 6}[self.colour_type]
 
-        for x in range(w):
-            for y in range(h):
-                px = self.get_pixel(x, y)
-                new_pixels[y][x] = px + [(2**self.bit_depth)-1]
+        alpha = (2**self.bit_depth)-1
+        new_pixels = [[px + [alpha] for px in row] for row in self._pixels]
         self.replace_pixels(new_pixels)
 
     def remove_alpha(self) -> None:
@@ -543,14 +519,9 @@ class Image:
             raise ValueError(
                 "Can only remove alpha samples from images that have them.")
 
-        w, h = self.shape
-        new_pixels = [[[] for _ in range(w)]for _ in range(h)]
         self._colour_type = {4: 0, 6: 2}[self.colour_type]
 
-        for x in range(w):
-            for y in range(h):
-                px = self.get_pixel(x, y)
-                new_pixels[y][x] = px[:-1]
+        new_pixels = [[px[:-1] for px in row] for row in self._pixels]
         self.replace_pixels(new_pixels)
 
     @property
@@ -564,7 +535,7 @@ class Image:
         if not self._finished_parsing:
             raise ValueError("Cannot get pixels, we haven't finished parsing.")
 
-        return deepcopy(self._pixels)
+        return [[pix.copy() for pix in row] for row in self._pixels]
 
     def replace_pixels(self, new_pixels: List[List[List[int]]]) -> None:
         """
@@ -576,13 +547,22 @@ class Image:
         @return whether the pixel list has been changed.
 
         """
-        len_prev_row: int | None = None
+        row_length = len(new_pixels[0])
+        samples_per_pixel = self.numb_samples_per_pixel
+        max_sample = (1 << self._bit_depth) - 1
+
         for row in new_pixels:
-            if len_prev_row != None and len(row) != len_prev_row:
+            if len(row) != row_length:
                 raise ValueError("Rows of pixels must be of the same length.")
-            for px in row:
-                self._test_pixel(px)
-            len_prev_row = len(row)
+            if set(map(len, row)) - {samples_per_pixel}:
+                raise ValueError("Pixel has the incorrect number of samples.")
+            samples = list(chain.from_iterable(row))
+            if set(map(type, samples)) - {int}:
+                raise ValueError("Samples must be ints.")
+            if samples and max(samples) > max_sample:
+                raise ValueError("Sample is to large to be represented")
+            if samples and min(samples) < 0:
+                raise ValueError("Samples can't be negative.")
 
         self._width = len(new_pixels[0])
         self._height = len(new_pixels)
@@ -598,9 +578,14 @@ class Image:
         if len(pix) != self.numb_samples_per_pixel:
             raise ValueError("Pixel has the incorrect number of samples.")
 
+        max_sample = (1 << self._bit_depth) - 1
         for sample in pix:
-            if sample.bit_length() > self.bit_depth or sample < 0:
+            if type(sample) is not int:
+                raise ValueError("Samples must be ints.")
+            if sample > max_sample:
                 raise ValueError("Sample is to large to be represented")
+            if sample < 0:
+                raise ValueError("Samples can't be negative.")
 
     def set_pixel(self, x: int, y: int, pix: List[int]):
         """
@@ -662,18 +647,15 @@ class Image:
 
         old_bit_depth = self.bit_depth
 
+        scaled = [int((sample / old_max)*new_max)
+                  for sample in range(old_max+1)]
+
         self._bit_depth = new_bit_depth
-        w, h = self.shape
-        for y in range(h):
-            for x in range(w):
-                pixel = self.get_pixel(x, y)
-                new_pixel = []
-                for i in range(len(pixel)):
-                    # scale to new range
-                    new_pixel.append(int((pixel[i] / old_max)*new_max))
-                self.set_pixel(x, y, new_pixel)
-        logging.info(f"Changed the bit_depth from {
-                     old_bit_depth} to {new_bit_depth}")
+        new_pixels = [[[scaled[sample] for sample in px] for px in row]
+                      for row in self._pixels]
+        self.replace_pixels(new_pixels)
+        logging.info("Changed the bit_depth from %s to %s",
+                     old_bit_depth, new_bit_depth)
 
     def apply_transform(self, transform):
         """
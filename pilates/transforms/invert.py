@@ -4,18 +4,25 @@ from ..image import Image
 
 class Invert(Transform):
 
+    def __init__(self, invert_alpha: bool = False):
+        self._invert_alpha = invert_alpha
+
     def apply(self, img: Image):
         """
         Apply an Invert on the image, pixel by pixel. For each sample
-        new_val = max_val - new_val. Alpha samples are left as they are.
+        new_val = max_val - new_val. Alpha samples are left as they are
+        unless invert_alpha was set.
         """
         pix_max_val = (2**img.bit_depth) - 1
 
-        w, h = img.shape
-        for y in range(h):
-            for x in range(w):
-                pix = img.get_pixel(x, y)
-                relevant_sample_count = min([len(pix), 3])
-                for i in range(relevant_sample_count):
-                    pix[i] = (pix_max_val - pix[i]) % pix_max_val
-                img.set_pixel(x, y, pix)
+        # alpha is always the last sample of a pixel
+        relevant_sample_count = img.numb_samples_per_pixel
+        if img.colour_type in [4, 6] and not self._invert_alpha:
+            relevant_sample_count -= 1
+
+        inverted_pixels = [[[pix_max_val - sample
+                             for sample in pix[:relevant_sample_count]]
+                            + pix[relevant_sample_count:]
+                            for pix in row]
+                           for row in img.get_pixels()]
+        img.replace_pixels(inverted_pixels)
@@ -1,5 +1,4 @@
 import math
-from typing import List
 import logging
 
 from .transform import Transform
@@ -17,64 +16,64 @@ class Resize(Transform):
         Apply resize using bi-linear sampling.
         """
 
-        def list_mul(lst: List[float] | List[int], x: float) -> List[float] | List[int]:
-            """
-            Multiply each element in a list by x. 
-            """
-            new_lst = []
-            for e in lst:
-                new_lst.append(e*x)
-
-            return new_lst
-
-        def list_add(lst1: List[float] | List[int], lst2: List[float] | List[int], lst3: List[float] | List[int], lst4: List[float] | List[int]) -> List[int]:
-            """
-            Add each element of each list. ie lst1[i]+lst2[i]+... Convert the result to an 
-            int.
-            """
-            if not (len(lst1) == len(lst2)) or not (len(lst2) == len(lst3)) or not (len(lst3) == len(lst4)):
-                raise ValueError(
-                    "To add the values of the lists they must be of the same length.")
-            new_lst = []
-            for i in range(len(lst1)):
-                e = sum([lst1[i], lst2[i], lst3[i], lst4[i]])
-                e = min(round(e), 2**img.bit_depth)
-                new_lst.append(e)
-            return new_lst
-
         w, h = img.shape
         new_w, new_h = self.new_shape
-        resized_pixels = [[[] for _ in range(new_w)] for _ in range(new_h)]
-        
+
+        if (new_w, new_h) == (w, h):
+            logging.info("Image already has shape %s, not resizing.",
+                         img.shape)
+            return
+
         # get the ratios of new_shape/old_shape
         x_ratio = (w-1)/(new_w-1) if new_w > 1 else 0
         y_ratio = (h-1)/(new_h-1) if new_h > 1 else 0
 
-        for new_x in range(new_w):
-            for new_y in range(new_h):
-                # get the four closest pixels
-                x1 = min(math.floor(x_ratio * new_x), w-1)
-                y1 = min(math.floor(y_ratio*new_y), h-1)
-                x2 = min(math.ceil(x_ratio * new_x), w-1)
-                y2 = min(math.ceil(y_ratio*new_y), h-1)
-
-                a = img.get_pixel(x1, y1)
-                b = img.get_pixel(x2, y1)
-                c = img.get_pixel(x1, y2)
-                d = img.get_pixel(x2, y2)
-                
-                # find the weights 
-                x_weight = (x_ratio * new_x) - x1
-                y_weight = (y_ratio * new_y) - y1
-
-                pixel = list_add(list_mul(a, (1-x_weight)*(1-y_weight)),
-                                 list_mul(b, x_weight*(1-y_weight)),
-                                 list_mul(c, y_weight*(1-x_weight)),
-                                 list_mul(d, x_weight*y_weight))
-
-                resized_pixels[new_y][new_x] = pixel
-        
-        logging.info(f"Resized image from {img.shape} to {self.new_shape}.")
+        if float(x_ratio).is_integer() and float(y_ratio).is_integer():
+            # every sample lands exactly on a source pixel
+            pixels = img.get_pixels()
+            xs = [new_x*int(x_ratio) for new_x in range(new_w)]
+            resized_pixels = [[pixels[new_y*int(y_ratio)][x] for x in xs]
+                              for new_y in range(new_h)]
+            logging.info("Resized image from %s to %s.", img.shape,
+                         self.new_shape)
+            img.replace_pixels(resized_pixels)
+            return
+
+        x_samples = [(min(math.floor(x_ratio * new_x), w-1),
+                      min(math.ceil(x_ratio * new_x), w-1))
+                     for new_x in range(new_w)]
+        y_samples = [(min(math.floor(y_ratio * new_y), h-1),
+                      min(math.ceil(y_ratio * new_y), h-1))
+                     for new_y in range(new_h)]
+        x_weights = [(x_ratio * new_x) - x_samples[new_x][0]
+                     for new_x in range(new_w)]
+        y_weights = [(y_ratio * new_y) - y_samples[new_y][0]
+                     for new_y in range(new_h)]
+
+        pixels = img.get_pixels()
+        clip = (1 << img.bit_depth) - 1
+
+        # bi-linear sampling is separable, blend rows horizontally first
+        x_taps = [(x1, x2, 1-x_weight, x_weight)
+                  for (x1, x2), x_weight in zip(x_samples, x_weights)]
+        blended_rows = {}
+        for y in sorted(set(y for y_pair in y_samples for y in y_pair)):
+            row = pixels[y]
+            blended_rows[y] = [[a_s*a_weight + b_s*b_weight
+                                for a_s, b_s in zip(row[x1], row[x2])]
+                               for x1, x2, a_weight, b_weight in x_taps]
+
+        resized_pixels = []
+        for (y1, y2), y_weight in zip(y_samples, y_weights):
+            top_weight = 1-y_weight
+
+            resized_pixels.append([[min(round(t_s*top_weight + b_s*y_weight),
+                                        clip)
+                                    for t_s, b_s in zip(top, bottom)]
+                                   for top, bottom in zip(blended_rows[y1],
+                                                          blended_rows[y2])])
+
+        logging.info("Resized image from %s to %s.", img.shape, self.new_shape)
         img.replace_pixels(resized_pixels)
 
     @property
@@ -1,3 +1,5 @@
+from itertools import chain
+
 from .transform import Transform
 from ..image import Image
 
@@ -9,13 +11,11 @@ class SortPixels(Transform):
 
     def apply(self, img: Image):
         pixels = img.get_pixels()
-        flat_pixels = sum(pixels, [])
-        flat_pixels = sorted(flat_pixels, key=lambda ls: sum(
-            ls[:3]), reverse=self._reverse)
+        flat_pixels = list(chain.from_iterable(pixels))
+        darkness = [sum(pix[:3]) for pix in flat_pixels]
+        order = sorted(range(len(flat_pixels)), key=darkness.__getitem__,
+                       reverse=self._reverse)
+        flat_pixels = [flat_pixels[i] for i in order]
 
         w, h = img.shape
-        i = 0
-        for y in range(h):
-            for x in range(w):
-                img.set_pixel(x, y, flat_pixels[i])
-                i += 1
+        img.replace_pixels([flat_pixels[y*w:(y+1)*w] for y in range(h)])
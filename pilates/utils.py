@@ -1,6 +1,5 @@
 from typing import Tuple
 import zlib
-import logging
 
 def get_x_bits(x: int, data: bytes) -> Tuple[bytes, bytes]:
     """
@@ -27,36 +26,40 @@ def get_x_bits(x: int, data: bytes) -> Tuple[bytes, bytes]:
 
     if overhang:
         mask = (0xFF >> overhang) ^ 0xFF
-        x_bytes = bytearray(x_bytes[:-1] + ((x_bytes[-1] & mask)).to_bytes(1,"big"))
-        x_bytes[-1] = (x_bytes[-1] >> (8-overhang)) % 256
+        x_bytes = bytearray(x_bytes)
+        x_bytes[-1] = (x_bytes[-1] & mask) >> (8-overhang)
         x_bytes = bytes(x_bytes)
-        modified_data = bytearray((data[x_len-1]).to_bytes(1) + data[x_len:])
 
-        for i in range(0,len(modified_data)-1):
-            modified_data[i] = (modified_data[i] << (overhang)) % 256
-            modified_data[i] = (modified_data[i]) | (((modified_data[i+1] & mask) >> (8-overhang) ) % 256)
-
-        modified_data[-1] = (modified_data[-1] << (overhang)) % 256
-        modified_data = bytes(modified_data) 
+        # shift the rest of the data left by overhang bits in one go by
+        # treating it as a single big-endian int, dropping the bits that
+        # fall off the front and zero filling the end
+        rest = data[x_len-1:]
+        rest_bits = len(rest)*8
+        shifted = (int.from_bytes(rest, "big") << overhang) & ((1 << rest_bits) - 1)
+        modified_data = shifted.to_bytes(len(rest), "big")
     else:
         modified_data = data[x_len:]
 
     return x_bytes, modified_data
 
-def check_crc(body: bytes, found_crc: bytes):
+def check_crc(chunk_type: bytes, body: bytes, found_crc: bytes):
     """
     Check crc, throw error if not correct
+
+    @param chunk_type: the four byte chunk type, which is covered by the crc
+    @param body: the data of the chunk
+    @param found_crc: the crc read from the end of the chunk
     """
-    if found_crc != get_crc(body):
+    if zlib.crc32(body, zlib.crc32(chunk_type)) != int.from_bytes(found_crc, "big"):
         raise ValueError("CRC check failed")
 
 
-def get_crc(body: bytes):
-    """
-    Get the crc32 for a given body
+def get_crc(chunk_type: bytes, body: bytes):
     """
-    return (zlib.crc32(body) % (1 << 32)).to_bytes(4)
+    Get the crc32 for a chunk
 
-
-def bytes_to_binary_string(byts: bytes):
-    return "".join([f"{x:08b}" for x in list(byts)])
+    @param chunk_type: the four byte chunk type, which is covered by the crc
+    @param body: the data of the chunk
+    """
+    # zlib.crc32 is always unsigned in python 3
+    return zlib.crc32(body, zlib.crc32(chunk_type)).to_bytes(4, "big")